@@ -102,13 +102,13 @@ class AdditivPlugin(
     def _check_printer_startup_state(self):
         """Check printer state during startup and send appropriate connection event."""
         state_id = self._printer.get_state_id()
-        self._logger.debug(f"Checking printer state during startup: {state_id}")
+        self._logger.debug("Checking printer state during startup: %s", state_id)
         
         if state_id == "OPERATIONAL":
             self._logger.debug("Printer is operational, sending Connected event")
             self.event_handler.handle_event("Connected", {})
         else:
-            self._logger.debug(f"Printer is not operational ({state_id}), sending Disconnected event")
+            self._logger.debug("Printer is not operational (%s), sending Disconnected event", state_id)
             self.event_handler.handle_event("Disconnected", {})
                     
     def on_event(self, event, payload):
@@ -136,6 +136,8 @@ class AdditivPlugin(
         """Clean up resources on shutdown"""
         if self.printer_commands:
             self.printer_commands.stop_ping_loop()
+        if self.job_handler:
+            self.job_handler.on_shutdown()
         if self.telemetry_handler:
             self.telemetry_handler.on_shutdown()
         if self.additv_client:
@@ -152,10 +154,10 @@ class AdditivPlugin(
         if action is None:
             return None
 
-        self._logger.debug(f"Action received: {action}")
+        self._logger.debug("Action received: %s", action)
 
-        if ";" in action:
-            action = action.split(";")[0].strip()
+        # Drop any trailing ";" comment
+        action = action.partition(";")[0].strip()
 
         if action == "ready" and self._on_ready:
             self._logger.debug("Action Received from Printer: Ready")
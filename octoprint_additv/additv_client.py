@@ -4,8 +4,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 import os
 import json
-from threading import Thread, Lock
+from threading import Thread, Lock, Event
 from queue import Queue, Empty
+from collections import deque
+import httpx
 import yaml
 from supabase import create_client
 
@@ -42,7 +44,7 @@ class SettingsManager:
     def _load_settings(self) -> None:
         """Load settings from yaml file."""
         if self._settings_file.exists():
-            self._logger.debug(f"Loading settings from {self._settings_file}")
+            self._logger.debug("Loading settings from %s", self._settings_file)
             try:
                 with open(self._settings_file, 'r', encoding='utf-8') as f:
                     data = yaml.safe_load(f)
@@ -61,7 +63,7 @@ class SettingsManager:
         try:
             # Ensure directory exists
             self._settings_file.parent.mkdir(parents=True, exist_ok=True)
-            self._logger.debug(f"Saving settings to {self._settings_file}")
+            self._logger.debug("Saving settings to %s", self._settings_file)
             
             settings_dict = {
                 'url': self._settings.url,
@@ -106,19 +108,19 @@ class SettingsManager:
             }
 
             # Log request details
-            self._logger.debug(f"Registering printer with URL: {register_url}")
-            self._logger.debug(f"Request headers: {headers}")
-            self._logger.debug(f"Request data: {data}")
+            self._logger.debug("Registering printer with URL: %s", register_url)
+            self._logger.debug("Request headers: %s", headers)
+            self._logger.debug("Request data: %s", data)
 
             # Make request
             response = requests.post(register_url, headers=headers, json=data)
             
             # Log response
-            self._logger.debug(f"Registration response status: {response.status_code}")
-            self._logger.debug(f"Registration response headers: {dict(response.headers)}")
+            self._logger.debug("Registration response status: %s", response.status_code)
+            self._logger.debug("Registration response headers: %s", dict(response.headers))
             
             response_data = response.json()
-            self._logger.debug(f"Registration response data: {response_data}")
+            self._logger.debug("Registration response data: %s", response_data)
 
             # Update settings
             self.update_settings(
@@ -146,6 +148,18 @@ class QueuedOperation:
 
 class AdditvClient:
     """Client for handling asynchronous communication with Additv backend services"""    
+    # Queued operations that fail transiently are retried this many times, waiting RETRY_INITIAL_DELAY
+    # seconds and doubling the wait (up to max_retry_delay) after every failure
+    MAX_RETRIES = 4
+    RETRY_INITIAL_DELAY = 0.5
+    # PostgREST's own codes for a database it cannot reach, sent with a 503/504
+    TRANSIENT_ERROR_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+    # Telemetry batches waiting for the worker are capped, dropping the oldest, so an
+    # unreachable backend cannot grow the backlog without limit
+    MAX_PENDING_TELEMETRY_BATCHES = 100
+    # Queued in place of a telemetry operation, the worker takes the oldest pending batch for it
+    _TELEMETRY_READY = object()
+
     def __init__(self, printer_name: str, logger=None, 
                  on_token_refresh: Optional[Callable[[str], None]] = None, 
                  plugin_data_folder: Optional[str] = None,
@@ -157,14 +171,16 @@ class AdditvClient:
             
         self._logger = logger
         if self._logger:
-            self._logger.debug(f"Initializing AdditvClient for printer: {printer_name}")
+            self._logger.debug("Initializing AdditvClient for printer: %s", printer_name)
         self._max_retry_delay = max_retry_delay
         self._settings_manager = SettingsManager(plugin_data_folder, logger)
         self._supabase = None
         self._printer_name = printer_name
         self._on_token_refresh = on_token_refresh
         self._queue = Queue()
+        self._telemetry_batches = deque(maxlen=self.MAX_PENDING_TELEMETRY_BATCHES)
         self._running = True
+        self._stop_event = Event()
         self._lock = Lock()
         self._worker_thread = Thread(target=self._process_queue, daemon=True)
         self._worker_thread.start()
@@ -188,7 +204,9 @@ class AdditvClient:
     def _initialize(self) -> None:
         """Initialize the client, handling registration if needed."""
         settings = self._settings_manager.settings
-        self._logger.debug(f"Initializing with settings - URL: {settings.url}, Has token: {bool(settings.registration_token)}, Has anon key: {bool(settings.anon_key)}, Has printer ID: {bool(settings.printer_id)}")
+        self._logger.debug("Initializing with settings - URL: %s, Has token: %s, Has anon key: %s, Has printer ID: %s",
+                           settings.url, bool(settings.registration_token), bool(settings.anon_key),
+                           bool(settings.printer_id))
         
         # Case 1: We have URL and registration token but no printer ID
         if (settings.url and settings.registration_token and settings.anon_key and
@@ -221,7 +239,7 @@ class AdditvClient:
     def _connect(self):
         """Establish connection to Additv backend"""
         try:
-            self._logger.debug(f"Connecting to Supabase at URL: {self.settings.url}")
+            self._logger.debug("Connecting to Supabase at URL: %s", self.settings.url)
             self._supabase = create_client(self.settings.url, self.settings.anon_key)
             
             # Set up auth state change listener
@@ -288,9 +306,11 @@ class AdditvClient:
         while self._running:
             try:
                 operation = self._queue.get(timeout=1.0)
+                if operation is self._TELEMETRY_READY:
+                    operation = self._next_telemetry_operation()
                 try:
                     self._logger.debug("Processing queued operation")
-                    operation()  # Execute the queued operation
+                    self._run_with_retries(operation)  # Execute the queued operation
                     self._logger.debug("Operation completed successfully")
                 except Exception as e:
                     error_str = str(e)
@@ -314,10 +334,43 @@ class AdditvClient:
             except Exception as e:
                 self._logger.error(f"Error processing queue: {str(e)}", exc_info=True)
 
+    def _next_telemetry_operation(self) -> Callable[[], Any]:
+        """Build the insert for the oldest pending telemetry batch"""
+        with self._lock:
+            batch_data = self._telemetry_batches.popleft()
+        return lambda: self._supabase.table("printer_telemetry").insert(batch_data).execute()
+
+    def _run_with_retries(self, operation: Callable[[], Any]) -> None:
+        """
+        Run a queued operation, retrying transient failures with exponential backoff. Anything
+        else (including expired JWTs, which _process_queue refreshes) is raised straight away,
+        since retrying a rejected insert only blocks the queue or writes duplicate rows.
+        """
+        delay = self.RETRY_INITIAL_DELAY
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            try:
+                operation()
+                return
+            except Exception as e:
+                if not self._is_transient(e) or not self._running:
+                    raise
+                self._logger.warning(f"Operation failed, retrying in {delay:.1f}s ({attempt}/{self.MAX_RETRIES}): {e}")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self._max_retry_delay)
+        operation()
+
+    def _is_transient(self, error: Exception) -> bool:
+        """Check whether a failed request is worth retrying: network errors, timeouts and 5xx responses"""
+        if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+            return True
+        # Error responses without a JSON body carry the HTTP status as their code
+        code = str(getattr(error, "code", None) or "")
+        return (len(code) == 3 and code.startswith("5") and code.isdigit()) or code in self.TRANSIENT_ERROR_CODES
+
     def publish_printer_event(self, event_type: str, data: Dict[str, Any]) -> None:
         """Publish a printer event to the Additv backend"""
         if self._running and self._supabase:
-            self._logger.debug(f"Queueing printer event: {event_type} with data: {data}")
+            self._logger.debug("Queueing printer event: %s with data: %s", event_type, data)
             self._queue.put(
                 lambda: self._supabase.table("printer_events")
                     .insert({"printer_id": self.settings.printer_id, "event": event_type, "data": data, "source_timestamp": datetime.now(timezone.utc).isoformat()})
@@ -326,27 +379,31 @@ class AdditvClient:
         else:
             self._logger.warning(f"Skipping event {event_type}: client not running or not connected")
 
-    def publish_telemetry_batch(self, telemetry_batch: List[Dict]) -> None:
-        """Publish a batch of telemetry events to the queue for processing"""
+    def publish_telemetry_batch(self, telemetry_batch: List[tuple]) -> None:
+        """Publish a batch of (data, source_timestamp) telemetry events to the queue for processing"""
         if not telemetry_batch:
             return
             
         if self._running and self._supabase:
+            printer_id = self.settings.printer_id
             batch_data = [
                 {
-                    "printer_id": self.settings.printer_id,
-                    "data": telemetry["data"],
-                    "source_timestamp": telemetry["source_timestamp"]
+                    "printer_id": printer_id,
+                    "data": data,
+                    "source_timestamp": source_timestamp
                 }
-                for telemetry in telemetry_batch
+                for data, source_timestamp in telemetry_batch
             ]
             
-            self._logger.debug(f"Queueing batch of {len(telemetry_batch)} telemetry events")
-            self._queue.put(
-                lambda: self._supabase.table("printer_telemetry")
-                    .insert(batch_data)
-                    .execute()
-            )
+            self._logger.debug("Queueing batch of %d telemetry events", len(telemetry_batch))
+            with self._lock:
+                full = len(self._telemetry_batches) == self._telemetry_batches.maxlen
+                self._telemetry_batches.append(batch_data)
+            if full:
+                # The dropped batch's marker is still queued and picks up the next oldest one
+                self._logger.warning("Telemetry backlog full, dropped the oldest pending batch")
+            else:
+                self._queue.put(self._TELEMETRY_READY)
         else:
             self._logger.warning("Skipping telemetry batch: client not running or not connected")
 
@@ -370,7 +427,7 @@ class AdditvClient:
                 "progress": progress,
                 "odometer_readings": odometer_readings
             }
-            self._logger.debug(f"Calling post-job-progress with params: {params}")
+            self._logger.debug("Calling post-job-progress with params: %s", params)
             return self.call_edge_function("post-job-progress", params)
         else:
             error_msg = "Client not running or not connected"
@@ -412,11 +469,11 @@ class AdditvClient:
             
             # Check for 204 No Content response
             if hasattr(response, 'status_code') and response.status_code == 204:
-                self._logger.debug(f"Edge function returned 204 No Content")
+                self._logger.debug("Edge function returned 204 No Content")
                 return None, None
                 
             # Log the raw response for debugging
-            self._logger.debug(f"Edge function raw response: {response}")
+            self._logger.debug("Edge function raw response: %s", response)
             
             # Parse response data
             try:
@@ -445,7 +502,7 @@ class AdditvClient:
                     error_msg = f"Edge function returned error: {data['error']}"
                     self._logger.error(error_msg)
                     if 'details' in data:
-                        self._logger.debug(f"Error details: {data['details']}")
+                        self._logger.debug("Error details: %s", data['details'])
                     return None, error_msg
                     
                 return data, None
@@ -463,6 +520,7 @@ class AdditvClient:
         self._logger.info("Stopping AdditvClient")
         with self._lock:
             self._running = False
+        self._stop_event.set()
         if self._worker_thread.is_alive():
             self._logger.debug("Waiting for worker thread to complete...")
             self._worker_thread.join(timeout=5.0)
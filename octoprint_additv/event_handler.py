@@ -50,17 +50,27 @@ class EventHandler:
                 # We should eventually filter the PrinterStateChanged events to only record the ones that are relevant
                 # as this event duplicates some other events and we only care about the state of the USB connection
                 # Logging all PrinterStateChanged events for now
-                self._logger.debug(f"Recording event {event}")
+                self._logger.debug("Recording event %s", event)
                 
                 # Disable our preheater if the printer is reset so it doesnt keep trying to start the job
                 if event in ("PrinterReset", "FirmwareData", "Connected", "Disconnected"):
                     # Cancel any preheat jobs if the printer is reset
                     self._job_handler.cancel_preheat()
+
+                # Send batched job progress before the end of the job is recorded, both in order
+                # off the event thread
+                if event in ("PrintDone", "PrintFailed", "PrintCancelled"):
+                    self._job_handler.flush_progress_then(self.insert_event, event, payload)
+                    return
                 
                 self.insert_event(event, payload)
 
+                # Swap in the gcode hook matching the connected printer's firmware
+                if event == "FirmwareData":
+                    self._specialize_gcode_hook(payload.get("name") or "")
+
         except Exception as e:
-            self._logger.debug(f"Error handling event {event}: {str(e)}")
+            self._logger.debug("Error handling event %s: %s", event, e)
 
     def insert_event(self, event_type: str, data: Dict[str, Any]) -> None:
         """Insert an event into the printer_events table"""
@@ -84,8 +94,23 @@ class EventHandler:
         except Exception as e:
             self._logger.error(f"Error publishing event {event_type}: {str(e)}")
 
+    def _specialize_gcode_hook(self, firmware_name: str) -> None:
+        """Rebind process_gcode_received_hook to the variant for the reported firmware"""
+        firmware = next((fw for fw in self._HOOK_BY_FIRMWARE if fw in firmware_name), "generic")
+        hook = self._HOOK_BY_FIRMWARE[firmware]
+        self.process_gcode_received_hook = hook.__get__(self)
+        self._logger.debug("Using %s gcode hook for firmware: %s", firmware, firmware_name)
+
+    def _hook_marlin(self, line: str) -> None:
+        """Stock Marlin emits none of the Prusa-Firmware diagnostics we watch for"""
+        return None
+
     def process_gcode_received_hook(self, line: str) -> None:
-        """Process GCODE lines for specific events"""
+        """Process GCODE lines for specific events
+
+        All patterns below are Prusa-Firmware diagnostics. This generic version is used until
+        FirmwareData arrives, after which _specialize_gcode_hook may rebind it per instance.
+        """
         # Quick length check first
         if len(line) < 4:  # Minimum length for any of our patterns to quickly fail out if not met
             return
@@ -113,3 +138,10 @@ class EventHandler:
                 self.handle_event("HotendFanError", {"line": line})
             elif "Print" in line:
                 self.handle_event("PartFanError", {"line": line})
+
+    # Checked in order, "Prusa-Firmware ... based on Marlin" must resolve to Prusa
+    _HOOK_BY_FIRMWARE = {
+        "Prusa": process_gcode_received_hook,
+        "Marlin": _hook_marlin,
+        "generic": process_gcode_received_hook,
+    }
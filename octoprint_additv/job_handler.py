@@ -1,14 +1,41 @@
-from io import BytesIO
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
-from decimal import Decimal
-import requests
+import hmac
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import certifi
+import urllib3
+from urllib3.util.retry import Retry
 import zipfile
 import hashlib
-from octoprint.util import RepeatedTimer
+from octoprint.printer import PrinterCallback
 from .filament_tracker import FilamentTracker
 
-@dataclass
+# Job file hashes are hex encoded SHA-256 digests
+_SHA256_HEX = re.compile(r"\A[0-9a-fA-F]{64}\Z").match
+
+# Written next to each verified download so identical gcode can be reused across jobs
+_HASH_SIDECAR_SUFFIX = ".sha256"
+
+# Suffix of the archive while it is being downloaded, OctoPrint does not list these files
+_PARTIAL_DOWNLOAD_SUFFIX = ".zip.part"
+
+_CHUNK_SIZE = 64 * 1024
+
+# LCD line shown during the preheat heat soak countdown
+_HEAT_SOAK_MESSAGE = "Heat soak - {} sec"
+
+@dataclass(slots=True, repr=False)
 class Job:
     job_id: int
     gcode_id: int
@@ -17,6 +44,14 @@ class Job:
     file_hash: str
     estimated_print_time_seconds: int = 0
     octoprint_filename: str = None
+    # file_hash decoded once, a job may be downloaded and verified more than once
+    file_digest: bytes = field(init=False, compare=False)
+
+    def __post_init__(self):
+        self.file_digest = bytes.fromhex(self.file_hash)
+
+    def __repr__(self):
+        return f"Job(job_id={self.job_id}, gcode_id={self.gcode_id}, gcode_filename={self.gcode_filename!r})"
 
     @classmethod
     def from_dict(cls, data: dict, logger) -> Optional['Job']:
@@ -45,6 +80,12 @@ class Job:
         # Log all received fields for debugging
         logger.debug("Received job data fields: %s", ', '.join(data.keys()))
         logger.info("Retrieved job %s with gcode %s", data['job_id'], data['gcode_id'])
+
+        # Reject malformed hashes before spending a download on them
+        file_hash = str(data['file_hash'])
+        if not _SHA256_HEX(file_hash):
+            logger.error("Invalid file hash for job %s: %r", data['job_id'], file_hash)
+            return None
         
         try:
             return cls(
@@ -52,22 +93,81 @@ class Job:
                 gcode_id=data['gcode_id'],
                 gcode_url_compressed=data['gcode_url_compressed'],
                 gcode_filename=data['gcode_filename'],
-                file_hash=data['file_hash'],
+                file_hash=file_hash.lower(),
                 estimated_print_time_seconds=data['estimated_print_time_seconds']
             )
         except Exception as e:
             logger.error("Error creating Job object: %s", str(e))
             return None
 
-class BytesIOWrapper:
-    def __init__(self, bytes_io):
-        self.bytes_io = bytes_io
+def _ca_bundle_kwargs() -> dict:
+    """
+    Verify TLS against the CA bundle requests would use: $REQUESTS_CA_BUNDLE or
+    $CURL_CA_BUNDLE (a file or a directory), falling back to certifi's bundle.
+    """
+    bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or certifi.where()
+    if os.path.isdir(bundle):
+        return {"cert_reqs": "CERT_REQUIRED", "ca_cert_dir": bundle}
+    return {"cert_reqs": "CERT_REQUIRED", "ca_certs": bundle}
+
+def _proxy_manager(proxy: str, pool_kwargs: dict):
+    """
+    Build a pool manager for proxy the way requests would: socks:// proxies go through
+    urllib3's SOCKS support (which needs PySocks), and credentials in an http(s) proxy URL
+    are sent as Proxy-Authorization.
+    """
+    parsed = urllib3.util.parse_url(proxy)
+    scheme = (parsed.scheme or "http").lower()
+    if scheme.startswith("socks"):
+        try:
+            from urllib3.contrib.socks import SOCKSProxyManager
+        except ImportError:
+            raise ValueError(f"Missing dependencies for {scheme} proxy support, install PySocks")
+        # SOCKSProxyManager reads the credentials from the URL itself
+        return SOCKSProxyManager(proxy, **pool_kwargs)
+
+    proxy_headers = None
+    if parsed.auth:
+        username, _, password = parsed.auth.partition(":")
+        proxy_headers = urllib3.make_headers(
+            proxy_basic_auth=f"{urllib.parse.unquote(username)}:{urllib.parse.unquote(password)}"
+        )
+    return urllib3.ProxyManager(proxy, proxy_headers=proxy_headers, **pool_kwargs)
+
+def _file_signature(path: str) -> tuple:
+    """Size and mtime of path, which change whenever the file is rewritten or replaced"""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def _parse_sidecar(text: str) -> tuple:
+    """Split hash sidecar contents into (file_hash, signature), (None, None) if malformed"""
+    fields = text.split()
+    if len(fields) != 3 or not _SHA256_HEX(fields[0]) or not (fields[1].isdigit() and fields[2].isdigit()):
+        return None, None
+    return fields[0].lower(), (int(fields[1]), int(fields[2]))
+
+def _remove_if_exists(path: str):
+    """Remove path, ignoring it if it is already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+@contextmanager
+def _removing(path):
+    """Remove path when the block exits, however it exits"""
+    try:
+        yield
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
 
-    def save(self, path):
-        with open(path, 'wb') as f:
-            f.write(self.bytes_io.getvalue())
+class JobHandler(PrinterCallback):
+    PROGRESS_BATCH_SIZE = 16
+    PROGRESS_FLUSH_INTERVAL = 15.0  # seconds
+    HASH_INDEX_SIZE = 256
+    GCODE_BATCH_LINES = 256
 
-class JobHandler:
     def __init__(self, additv_plugin):
         self._octoprint = additv_plugin
         self._additv_client = additv_plugin.additv_client
@@ -76,10 +176,36 @@ class JobHandler:
         self._upload_folder = "Additv"
         self._printer = additv_plugin._printer
         self._printer_commands = additv_plugin.printer_commands
+        # Keep-alive pool so repeat gcode downloads reuse the TCP/TLS connection. Proxies from
+        # $HTTP(S)_PROXY get pools of their own, see _pool_for
+        self._pool_kwargs = dict(
+            num_pools=2,
+            maxsize=4,
+            retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+            **_ca_bundle_kwargs()
+        )
+        self._http = urllib3.PoolManager(**self._pool_kwargs)
+        self._proxies = urllib.request.getproxies()
+        self._proxy_pools = {}
+        # Fetching and downloading jobs happens off the calling thread, one job at a time
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="additv-dl")
+        self._preparing = None
+        # file_hash -> on-disk path of a verified download, least recently used first
+        self._hash_index = OrderedDict()
+        self._load_hash_index()
         self._job = None
         self._filament_tracker = FilamentTracker()
-        self._last_reported_e = Decimal('0.0')
-        self.preheat_timer = None
+        # Sent gcode is buffered and handed to the filament tracker in batches
+        self._line_buf = []
+        self._line_lock = threading.Lock()
+        self._last_reported_e = 0.0
+        self._pending_progress = []
+        self._latest_progress = 0.0
+        self._last_progress_flush = time.monotonic()
+        self._progress_lock = threading.Lock()
+        self._preheating = False
+        self._last_preheat_update = 0.0
+        self._last_lcd_seconds = None
         self.delay_time_remaining = 0
 
     def report_job_progress(self, progress: float):
@@ -89,31 +215,64 @@ class JobHandler:
             progress (float): Progress percentage (0-100)
         
         The odometer readings track filament usage for this specific job,
-        resetting at the start of each new job.
+        resetting at the start of each new job. Readings are batched and sent
+        once PROGRESS_BATCH_SIZE have been collected, PROGRESS_FLUSH_INTERVAL
+        seconds have passed since the last send, or the print reaches 100%.
         """
         if self._job is None:
             self._logger.warning("Cannot report job progress: No active job")
             return
 
         self._logger.info(f"Print progress: {progress}% for job {self._job.job_id}")
-        
+
+        # OctoPrint may report progress from the comm thread while a job ends on another
+        with self._progress_lock:
+            current_e = self._flush_gcode_lines()
+            self._pending_progress.append({
+                "e_last_reported": self._last_reported_e,
+                "e_current": current_e
+            })
+            self._last_reported_e = current_e
+            self._latest_progress = progress
+
+            if (len(self._pending_progress) >= self.PROGRESS_BATCH_SIZE
+                    or time.monotonic() - self._last_progress_flush >= self.PROGRESS_FLUSH_INTERVAL
+                    or progress >= 100):
+                self._send_pending_progress()
+
+    def flush_progress(self):
+        """Send any batched progress readings for the current job"""
+        with self._progress_lock:
+            self._send_pending_progress()
+
+    def flush_progress_then(self, fn, *args):
+        """
+        Send batched progress and then call fn(*args), both on the download worker so a slow
+        backend never holds up the calling thread (usually OctoPrint's event thread)
+        """
+        def flush_then():
+            self.flush_progress()
+            fn(*args)
+        self._io.submit(flush_then)
+
+    def _send_pending_progress(self):
+        """Publish batched odometer readings, keeping them for the next attempt on failure.
+        Callers must hold _progress_lock."""
+        if not self._pending_progress or self._job is None:
+            return
+
+        self._last_progress_flush = time.monotonic()
         try:
-            current_e = self._filament_tracker.total_extrusion
-            odometer_readings = [{
-                "e_last_reported": float(self._last_reported_e),
-                "e_current": float(current_e)
-            }]
-            
             result, error = self._additv_client.publish_job_progress(
                 self._job.job_id,
-                progress,
-                odometer_readings
+                self._latest_progress,
+                self._pending_progress
             )
             
             if error:
                 self._logger.error(f"Error publishing job progress: {error}")
             else:
-                self._last_reported_e = current_e
+                self._pending_progress = []
                 
         except Exception as e:
             self._logger.error(f"Error publishing progress: {str(e)}")
@@ -163,9 +322,172 @@ class JobHandler:
             self._printer_commands.send_lcd_message("Error fetching job")
             return None
 
+    def _gcode_on_disk(self, filename: str) -> bool:
+        """
+        Check for an already downloaded, non-empty gcode file with a single stat on its
+        on-disk path, only asking the storage manager if the stat itself errors out.
+        """
+        try:
+            return os.path.getsize(self._file_storage.path_on_disk(filename)) > 0
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return self._file_storage.file_exists(filename)
+
+    def _load_hash_index(self):
+        """
+        Rebuild the file hash index from the sidecar files of earlier downloads, and remove
+        partial downloads left behind by jobs that never completed
+        """
+        try:
+            folder = self._file_storage.path_on_disk(self._upload_folder)
+            sidecars = []
+            for e in os.scandir(folder):
+                if e.name.endswith(_HASH_SIDECAR_SUFFIX) and e.is_file():
+                    sidecars.append(e)
+                elif e.name.endswith(_PARTIAL_DOWNLOAD_SUFFIX) and e.is_file():
+                    # Not listed by OctoPrint, so nobody else would ever clean these up
+                    _remove_if_exists(e.path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self._logger.warning(f"Could not scan for downloaded gcode hashes: {str(e)}")
+            return
+
+        entries = []
+        for sidecar in sidecars:
+            gcode_path = sidecar.path[:-len(_HASH_SIDECAR_SUFFIX)]
+            try:
+                mtime = sidecar.stat().st_mtime
+                with open(sidecar.path, 'r', encoding='utf-8') as f:
+                    file_hash, signature = _parse_sidecar(f.read())
+                if file_hash is None or _file_signature(gcode_path) != signature:
+                    # The gcode file was deleted or replaced since it was verified
+                    os.remove(sidecar.path)
+                    continue
+            except FileNotFoundError:
+                # The gcode file is gone, its sidecar is of no use anymore
+                if os.path.exists(sidecar.path):
+                    os.remove(sidecar.path)
+                continue
+            except OSError:
+                continue  # Removed while we were scanning, or unreadable
+            entries.append((mtime, file_hash, gcode_path, signature))
+
+        # Oldest first, so the most recent downloads survive trimming
+        entries.sort(key=lambda e: e[0])
+        for _, file_hash, gcode_path, signature in entries:
+            self._index_gcode_hash(file_hash, gcode_path, signature)
+        self._logger.debug("Indexed %d previously downloaded gcode files", len(self._hash_index))
+
+    def _index_gcode_hash(self, file_hash: str, path: str, signature: tuple):
+        """Record path as the newest copy of file_hash, evicting the least recently used entries"""
+        self._hash_index[file_hash] = (path, signature)
+        self._hash_index.move_to_end(file_hash)
+        while len(self._hash_index) > self.HASH_INDEX_SIZE:
+            self._hash_index.popitem(last=False)
+
+    def _remember_gcode_hash(self, file_hash: str, path: str):
+        """
+        Write the verified hash next to the gcode file and add it to the index, along with the
+        file's size and mtime so a file replaced under the same name is not taken for it later
+        """
+        try:
+            signature = _file_signature(path)
+            with open(path + _HASH_SIDECAR_SUFFIX, 'w', encoding='utf-8') as f:
+                f.write(f"{file_hash} {signature[0]} {signature[1]}")
+        except OSError as e:
+            self._logger.warning(f"Could not record hash for {path}: {str(e)}")
+            return
+        self._index_gcode_hash(file_hash, path, signature)
+
+    def _link_cached_gcode(self, job: Job, filename: str) -> bool:
+        """
+        Hardlink (or copy, where linking is not possible) a previously verified download with
+        the job's file hash into place under filename.
+
+        Returns:
+            bool: True if the gcode file was provided from an earlier download
+        """
+        entry = self._hash_index.get(job.file_hash)
+        if not entry:
+            return False
+        existing, signature = entry
+        try:
+            unchanged = _file_signature(existing) == signature
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            # Deleted or replaced since it was verified, the job's gcode has to be downloaded
+            self._logger.info(f"Cached gcode file {existing} changed since it was verified, not reusing it")
+            del self._hash_index[job.file_hash]
+            return False
+
+        path = self._file_storage.path_on_disk(filename)
+        try:
+            os.link(existing, path)
+        except OSError:
+            # Copy next to the target and rename it into place, so an interrupted copy never
+            # leaves a truncated file behind that _gcode_on_disk would take as downloaded
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".gcode.tmp")
+            os.close(fd)
+            with _removing(tmp_path):
+                shutil.copyfile(existing, tmp_path)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+        self._remember_gcode_hash(job.file_hash, path)
+        self._logger.info(f"Reused gcode file {existing} with matching hash as {filename}, skipping download")
+        return True
+
+    def _pool_for(self, url: str):
+        """Pick the direct pool or a proxy pool for url, following $HTTP(S)_PROXY, $ALL_PROXY and $NO_PROXY"""
+        parsed = urllib3.util.parse_url(url)
+        proxy = self._proxies.get(parsed.scheme) or self._proxies.get("all")
+        if not proxy or urllib.request.proxy_bypass(parsed.host or ""):
+            return self._http
+        pool = self._proxy_pools.get(proxy)
+        if pool is None:
+            pool = self._proxy_pools[proxy] = _proxy_manager(proxy, self._pool_kwargs)
+        return pool
+
+    def _fetch_archive(self, url: str, part_path: str):
+        """
+        Download url into part_path, resuming with an HTTP Range request when an earlier
+        attempt left a partial download behind.
+        """
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        # The archive is already compressed, and Ranges apply to the encoded body, so always
+        # ask for it unencoded
+        headers = {"Accept-Encoding": "identity"}
+        if resume_from:
+            headers["Range"] = f"bytes={resume_from}-"
+
+        response = self._pool_for(url).request(
+            "GET", url, headers=headers, preload_content=False,
+            timeout=urllib3.Timeout(connect=5, read=30)
+        )
+        try:
+            if resume_from and response.status == 416:
+                self._logger.info(f"Partial download {part_path} is already complete")
+                return
+            if response.status >= 400:
+                raise urllib3.exceptions.HTTPError(f"HTTP {response.status} downloading {url}")
+
+            if resume_from and response.status == 206:
+                self._logger.info(f"Resuming download at byte {resume_from}")
+                mode = 'ab'
+            else:
+                mode = 'wb'  # Fresh download, or the server ignored the range
+
+            with open(part_path, mode) as out:
+                for chunk in response.stream(_CHUNK_SIZE):
+                    out.write(chunk)
+        finally:
+            response.release_conn()
+
     def _download_gcode(self, job: Job) -> bool:
         """
-        Downloads and saves a gcode file from the given URL using OctoPrint's file manager.
+        Downloads and saves a gcode file from the given URL into OctoPrint's upload folder.
         
         Args:
             job (Job): The job object containing gcode information
@@ -173,99 +495,133 @@ class JobHandler:
         Returns:
             bool: True if successful, False otherwise
         """
+        tmp_path = None
+        # Reported as the error key if anything below fails, so consumers can tell the stages apart
+        stage = "save_gcode_failed"
         try:
             # Extract base filename without extension
-            base_filename = job.gcode_filename.split('.')[0]
+            base_filename = job.gcode_filename.partition('.')[0]
             filename = f"{self._upload_folder}/{base_filename}_id-{job.gcode_id}.gcode"
             job.octoprint_filename = filename
+            path = self._file_storage.path_on_disk(filename)
+            # The archive is kept on disk next to the target until it has been extracted, so an
+            # interrupted download can be resumed on retry
+            part_path = path + _PARTIAL_DOWNLOAD_SUFFIX
             
             # Check if file exists
-            if self._file_storage.file_exists(filename):
+            if self._gcode_on_disk(filename):
                 self._logger.info(f"Gcode file {filename} already exists, skipping download")
+                _remove_if_exists(part_path)
+                return True
+
+            # Create the upload folder once up front; everything below writes straight into it
+            folder = Path(path).parent
+            folder.mkdir(parents=True, exist_ok=True)
+
+            # Reuse identical gcode downloaded for an earlier job instead of fetching it again
+            if self._link_cached_gcode(job, filename):
+                _remove_if_exists(part_path)
                 return True
                 
             # Download the file from the URL
             self._logger.info(f"Downloading gcode from {job.gcode_url_compressed}")
-            response = requests.get(job.gcode_url_compressed, stream=True, timeout=30)
-            response.raise_for_status()
-            # Stream the downloaded content into a BytesIO buffer
-            zip_obj = BytesIO()
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    zip_obj.write(chunk)
-            zip_obj.seek(0)
-            
-            # Extract the gcode file from the zip
-            with zipfile.ZipFile(zip_obj) as zip_file:
-                # Get the first file in the zip (assuming it's the gcode file)
-                gcode_filename = zip_file.namelist()[0]
-                self._logger.info(f"Extracting {gcode_filename} from zip file")
-                gcode_content = zip_file.read(gcode_filename)
-                self._logger.info(f"Successfully extracted gcode file from zip")
-                
-                # Verify file hash
-                file_hash = hashlib.sha256(gcode_content).hexdigest()
-                if file_hash != job.file_hash:
-                    error_msg = f"Hash mismatch for gcode file. Expected: {job.file_hash}, Got: {file_hash}"
-                    self._logger.error(error_msg)
-                    # Trigger PrintCancelled event with hash verification failure details
-                    self._octoprint.event_handler.handle_event("Error", {
-                        "error": "hash_verification_failed",
-                        "message": error_msg,
-                        "job_id": job.job_id,
-                        "gcode_id": job.gcode_id
-                    })
-                    return False
-                self._logger.info("File hash verification successful")
-            
-            # Create a new BytesIO object with the extracted gcode content
-            gcode_obj = BytesIO(gcode_content)
-            
-            # Wrap the BytesIO object with our custom wrapper that provides the save method
-            wrapped_file_obj = BytesIOWrapper(gcode_obj)
-            
-            # Save the downloaded file using LocalFileStorage
+            stage = "download_gcode_failed"
+            self._fetch_archive(job.gcode_url_compressed, part_path)
+            stage = "extract_gcode_failed"
+
+            # The archive is now either complete or unusable, a retry has to fetch it again
+            with _removing(part_path), open(part_path, 'rb') as zip_obj:
+                # Extract the gcode file from the zip, hashing it as it is written out. Reading the
+                # entry to EOF makes zipfile check its stored CRC-32, so corrupt or truncated
+                # archives raise BadZipFile here before we get to the SHA-256 comparison
+                with zipfile.ZipFile(zip_obj) as zip_file:
+                    # Use the gcode entry, falling back to the first file in the zip
+                    entries = zip_file.infolist()
+                    entry = next((e for e in entries if e.filename.lower().endswith(".gcode")), entries[0])
+                    self._logger.info(f"Extracting {entry.filename} from zip file")
+                    hasher = hashlib.sha256()
+                    # Extract next to the target so moving it into place is a rename, not a copy
+                    with zip_file.open(entry) as src, tempfile.NamedTemporaryFile(
+                            dir=folder, suffix=".gcode.tmp", delete=False) as dst:
+                        tmp_path = dst.name
+                        for chunk in iter(lambda: src.read(_CHUNK_SIZE), b''):
+                            hasher.update(chunk)
+                            dst.write(chunk)
+                    self._logger.info(f"Successfully extracted gcode file from zip")
+
+            # Verify file hash
+            if not hmac.compare_digest(hasher.digest(), job.file_digest):
+                error_msg = f"Hash mismatch for gcode file. Expected: {job.file_hash}, Got: {hasher.hexdigest()}"
+                self._logger.error(error_msg)
+                # Trigger PrintCancelled event with hash verification failure details
+                self._octoprint.event_handler.handle_event("Error", {
+                    "error": "hash_verification_failed",
+                    "message": error_msg,
+                    "job_id": job.job_id,
+                    "gcode_id": job.gcode_id
+                })
+                return False
+            self._logger.info("File hash verification successful")
+
+            stage = "save_gcode_failed"
+            # Rename the verified file into place. The rename is atomic, so the gcode never shows
+            # up half written, and OctoPrint picks up its metadata when it next lists the folder
             self._logger.info(f"Saving downloaded gcode as {filename}")
-            self._file_storage.add_folder(self._upload_folder)
-            self._file_storage.add_file(
-                filename,
-                wrapped_file_obj,
-                allow_overwrite=True
-            )
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+            self._remember_gcode_hash(job.file_hash, path)
             
             self._logger.info(f"Successfully downloaded gcode file {filename}")
             return True
             
         except Exception as e:
-            self._logger.error(f"Error downloading gcode file: {str(e)}")
-            
+            msg = f"Error downloading gcode file for job {job.job_id} ({stage}): {e}"
+            self._logger.error(msg)
             self._octoprint.event_handler.handle_event("Error", {
-            "error": "download_gcode_failed",
-            "message": error_msg,
-            "job_id": job.job_id,
-            "gcode_id": job.gcode_id
-                    })
-            
+                "error": stage,
+                "message": msg,
+                "job_id": job.job_id,
+                "gcode_id": job.gcode_id
+            })
             return False
 
-    def _handle_preheat_countdown(self):
+        finally:
+            # Left behind if extraction, verification or saving failed
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def on_printer_add_temperature(self, data):
+        """PrinterCallback hook, called by OctoPrint for every temperature report"""
+        if self._preheating:
+            self._handle_preheat_countdown(data)
+
+    def _handle_preheat_countdown(self, current_temps):
         """Handle the preheat countdown and temperature monitoring"""
-        current_temps = self._printer.get_current_temperatures()
-        nozzle_temp = float(current_temps.get('tool0', {}).get('actual', 0))
-        bed_temp = float(current_temps.get('bed', {}).get('actual', 0))
-        bed_target_temp = float(current_temps.get('bed', {}).get('target', 0))
+        # Count down by the real time between reports, the heat soak only progresses while hot
+        now = time.monotonic()
+        elapsed = now - self._last_preheat_update
+        self._last_preheat_update = now
+
+        # OctoPrint already reports floats (or None), unpack each heater once
+        tool = current_temps.get('tool0') or {}
+        bed = current_temps.get('bed') or {}
+        nozzle_temp = tool.get('actual') or 0.0
+        bed_temp = bed.get('actual') or 0.0
+        bed_target_temp = bed.get('target') or 0.0
 
         if nozzle_temp > 160:
             if self.delay_time_remaining > 0:
                 if bed_temp > 80 or bed_target_temp == 85:
-                    self._printer_commands.send_lcd_message(f"Heat soak - {self.delay_time_remaining} sec")
-                    self.delay_time_remaining -= 1
+                    # Only refresh the LCD when the displayed second changes
+                    seconds_remaining = int(self.delay_time_remaining)
+                    if seconds_remaining != self._last_lcd_seconds:
+                        self._last_lcd_seconds = seconds_remaining
+                        self._printer_commands.send_lcd_message(_HEAT_SOAK_MESSAGE.format(seconds_remaining))
+                    self.delay_time_remaining = max(0, self.delay_time_remaining - elapsed)
                 else:
                     self._printer.set_temperature("bed", 85)
             else:
-                if self.preheat_timer:
-                    self.preheat_timer.cancel()
-                    self.preheat_timer = None
+                self._stop_preheat()
                 # Now safe to start the print
                 self._printer.select_file(self._job.octoprint_filename, sd=False, printAfterSelect=True)
                 self._logger.info(f"Started print for job {self._job.job_id} with file {self._job.octoprint_filename}")
@@ -286,8 +642,11 @@ class JobHandler:
         self._printer_commands.send_lcd_message("Clean nozzle")
         
         if self.delay_time_remaining > 0:
-            self.preheat_timer = RepeatedTimer(1, self._handle_preheat_countdown)
-            self.preheat_timer.start()
+            self._last_preheat_update = time.monotonic()
+            self._last_lcd_seconds = None
+            self._preheating = True
+            # Temperature updates drive the countdown, only listen to the printer while it runs
+            self._printer.register_callback(self)
             self._logger.info(f"Started preheat sequence with {self.delay_time_remaining} second delay")
         else:    # No delay, start print immediately 
             self._printer.select_file(self._job.octoprint_filename, sd=False, printAfterSelect=True)
@@ -319,38 +678,137 @@ class JobHandler:
 
     def start_next_job(self):
         """
-        Gets a job from Additv, loads and starts it
+        Gets a job from Additv, loads and starts it. Fetching and downloading run on the
+        download worker so the calling thread (usually OctoPrint's comm thread) isn't blocked.
         """
-        if not self.preheat_timer:
-            job = self._get_next_job()
-            if job:
-                self._job = job
-                self._filament_tracker.reset()  # Reset extrusion tracking for new job
-                self._last_reported_e = Decimal('0.0')
-                self._logger.info("Retrieved job: %s", job)
-                self._download_gcode(job)
-                self._start_print(job)
-            else:
-                self._logger.info("No job available")
-        else:
+        if self._preheating:
             self._logger.error("Preheat already in progress, cannot start new job")
+            return
+        # Cleared only once the prepared job has been handed off to the preheat or print, so
+        # there is no window in which a second job could be claimed
+        if self._preparing:
+            self._logger.error("Job preparation already in progress, cannot start new job")
+            return
+
+        self._preparing = self._io.submit(self._prepare_next_job)
+        self._preparing.add_done_callback(self._on_job_prepared)
+
+    def _prepare_next_job(self) -> Optional[Job]:
+        """
+        Gets the next job and downloads its gcode, runs on the download worker.
+
+        Returns:
+            Job: The job if it is ready to print, None otherwise
+        """
+        job = self._get_next_job()
+        if not job:
+            self._logger.info("No job available")
+            return None
+
+        self.flush_progress()  # Send anything still batched for the previous job
+        with self._progress_lock:
+            self._job = job
+            with self._line_lock:
+                self._line_buf = []
+                self._filament_tracker.reset()  # Reset extrusion tracking for new job
+            self._last_reported_e = 0.0
+            self._pending_progress = []
+            self._latest_progress = 0.0
+        self._logger.info("Retrieved job: %s", job)
+
+        if not self._download_gcode(job):
+            # The failure has been reported, don't attribute later events and progress to the job
+            with self._progress_lock:
+                if self._job is job:
+                    self._job = None
+            return None
+        return job
+
+    def _on_job_prepared(self, future):
+        """Hand off a prepared job, then allow the next one to be claimed"""
+        try:
+            self._hand_off_prepared_job(future)
+        finally:
+            if self._preparing is future:
+                self._preparing = None
+
+    def _hand_off_prepared_job(self, future):
+        """Start printing a prepared job, unless preparation failed or was cancelled meanwhile"""
+        if future.cancelled():
+            return  # Cancelled before it ran, so no job was claimed
+        try:
+            job = future.result()
+        except Exception as e:
+            self._logger.error(f"Error preparing next job: {str(e)}")
+            return
+        if not job:
+            return
+        if future is not self._preparing:
+            self._drop_prepared_job(job)
+            return
+        self._start_print(job)
+
+    def _drop_prepared_job(self, job: Job):
+        """Report a claimed job whose preparation was cancelled or superseded, and forget it"""
+        msg = f"Preparation of job {job.job_id} was cancelled before it could start printing"
+        self._logger.warning(msg)
+        self._printer_commands.send_lcd_message("Job prep cancelled")
+        self._octoprint.event_handler.handle_event("Error", {
+            "error": "job_preparation_cancelled",
+            "message": msg,
+            "job_id": job.job_id,
+            "gcode_id": job.gcode_id
+        })
+        with self._progress_lock:
+            if self._job is job:
+                self._job = None
 
     def cancel_preheat(self):
-        """Cancel any active preheat timer and reset delay time"""
-        if self.preheat_timer:
-            self.preheat_timer.cancel()
-            self.preheat_timer = None
-            self.delay_time_remaining = 0
+        """Cancel any active preheat countdown or job preparation and reset delay time.
+        Runs on OctoPrint's event thread, batched progress is flushed on job end instead"""
+        if self._preparing:
+            self._preparing.cancel()
+            self._preparing = None
+        if self._preheating:
+            self._stop_preheat()
+
+    def _stop_preheat(self):
+        """End the preheat countdown and stop listening to the printer"""
+        self._preheating = False
+        self.delay_time_remaining = 0
+        # Unregister from the download worker rather than from inside the callback. OctoPrint's
+        # comm thread iterates its callback list without copying it, so a removal that lands mid
+        # loop can make it skip another callback for that one report; it never raises
+        self._io.submit(self._printer.unregister_callback, self)
+
+    def on_shutdown(self):
+        """Send batched progress, stop the download worker and detach from the printer"""
+        self._printer.unregister_callback(self)
+        self.flush_progress()
+        self._io.shutdown(wait=False, cancel_futures=True)
 
     def process_gcode_line(self, line: str):
         """
-        Process a line of gcode to track extrusion
+        Buffer a line of gcode for extrusion tracking, processing the buffer once
+        GCODE_BATCH_LINES have been collected
         Args:
             line (str): The gcode line to process
-        Returns:
-            float or None: Current total extrusion if line contained extrusion, None otherwise
         """
         if self._job is None:
-            return None
-            
-        return self._filament_tracker.process_line(line)
+            return
+
+        with self._line_lock:
+            self._line_buf.append(line)
+            if len(self._line_buf) >= self.GCODE_BATCH_LINES:
+                self._filament_tracker.process_batch(self._line_buf)
+                self._line_buf = []
+
+    def _flush_gcode_lines(self) -> float:
+        """
+        Process any buffered gcode lines
+        Returns:
+            float: Current total extrusion for the job
+        """
+        with self._line_lock:
+            lines, self._line_buf = self._line_buf, []
+            return self._filament_tracker.process_batch(lines)
@@ -1,63 +1,130 @@
+import re
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Optional, Dict, List, Union
 import logging
-from datetime import datetime, timezone
+
+# Fields of a temperature report such as "T:22.6 /0.0 B:23.7 /0.0 T0:22.6 /0.0 @:0 B@:0 P:0.0 A:30.6"
+# and of a fan report such as "E0:0 RPM PRN1:0 RPM E0@:0 PRN1@:0", matched as (key, value, target).
+# Keys must not follow a word character, which keeps "E0@:" and "PRN1@:" from reading as "@:"
+_TELEMETRY_RE = re.compile(
+    r"(?<!\w)(?P<key>T0|T|B@|B|@|A|E0|PRN1):\s*(?P<value>-?\d+(?:\.\d*)?)"
+    r"(?:\s*/\s*(?P<target>-?\d+(?:\.\d*)?))?"
+)
+
+# Heater power is reported as 0-127, telemetry sends it as 0-100%
+_POWER_SCALE = 100.0 / 127.0
+
+# Telemetry formats, picked from the printer profile's model
+UNKNOWN = 0
+VIRTUAL = 1
+PRUSA_MK3 = 2
+_TELEMETRY_TYPES = {"Virtual": VIRTUAL, "PrusaMK3": PRUSA_MK3}
+
+
+def _fields(pattern: re.Pattern, line: str) -> Dict[str, tuple]:
+    """Map each field key found in line to its remaining groups, keeping the first occurrence"""
+    return {match[0]: match[1:] for match in reversed(pattern.findall(line))}
+
+
+@dataclass(slots=True)
+class TelemetryRecord:
+    """One parsed telemetry reading, fields the printer did not report stay None"""
+    tool0_temp: Optional[float] = None
+    tool0_target_temp: Optional[float] = None
+    bed_temp: Optional[float] = None
+    bed_target_temp: Optional[float] = None
+    tool0_power: Optional[float] = None
+    bed_power: Optional[float] = None
+    ambient_temp: Optional[float] = None
+    tool0_heatsink_fan_rpm: Optional[float] = None
+    tool0_part_fan_rpm: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, float]:
+        """Return the reported fields as the data payload of a telemetry event"""
+        return {
+            name: value for name in self.__slots__
+            if (value := getattr(self, name)) is not None
+        }
+
 
 class TelemetryHandler:
-    def __init__(self, additv_client, printer_profile_manager, logger: Optional[logging.Logger] = None):
+    # Joins an MK3 temperature and fan report so both are parsed in one scan
+    _SENTINEL = "\0"
+    _TELEMETRY_PREFIXES = {
+        VIRTUAL: ("T:", "ok T:"),
+        PRUSA_MK3: ("T:", "E0:"),
+    }
+
+    def __init__(self, additv_client, printer_profile_manager, logger: Optional[logging.Logger] = None,
+                 send_interval: float = 10.0, max_pending: int = 100):
         self.additv_client = additv_client
         self._logger = logger or logging.getLogger(__name__)
-        self._pending_temp = None
-        self._pending_power = None
+        self.update_log_level()
+        # Latest MK3 temperature and fan report lines waiting for their counterpart
+        self._pending = [None, None]
         # Track last sent temperatures for filtering
         self._last_tool_temp = None
         self._last_bed_temp = None
         
         # Get printer model from profile
         printer_profile = printer_profile_manager.get_current_or_default()
-        self.telemetry_type = printer_profile.get("model", "Unknown")
+        self.telemetry_type = _TELEMETRY_TYPES.get(printer_profile.get("model"), UNKNOWN)
+        # Line prefixes that can carry telemetry for this printer type, everything else is
+        # rejected with a single startswith() in the gcode hook
+        self._telemetry_prefixes = self._TELEMETRY_PREFIXES.get(self.telemetry_type, ())
         
-        # Initialize telemetry buffer
-        self._telemetry_buffer = []
-        self.BUFFER_SIZE = 10
+        # Initialize telemetry buffer. A background thread sends a batch every SEND_INTERVAL
+        # seconds, or as soon as BUFFER_SIZE records are pending. At most MAX_BUFFER_SIZE unsent
+        # records are kept while batches cannot be handed to the client, dropping the oldest
+        self.BUFFER_SIZE = max_pending
+        self.SEND_INTERVAL = send_interval
+        self.MAX_BUFFER_SIZE = self.BUFFER_SIZE * 10
+        self._telemetry_buffer = deque(maxlen=self.MAX_BUFFER_SIZE)
+        self._buffer_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stopped = False
+        self._sender = threading.Thread(target=self._sender_loop, name="additv-telemetry", daemon=True)
+        self._sender.start()
+
 
+    def update_log_level(self) -> None:
+        """Cache whether debug logging is on, refreshed by the sender thread on every pass"""
+        self._debug = self._logger.isEnabledFor(logging.DEBUG)
 
     def process_gcode_received_hook(self, line: str) -> None:
-        if not line:
+        if not line.startswith(self._telemetry_prefixes):
             return
-        if self.telemetry_type == "Virtual":
-            self.process_virtual_telemetry(line)
-        elif self.telemetry_type == "PrusaMK3":
-            self.process_prusa_mk3_telemetry(line)
+        try:
+            if self.telemetry_type == VIRTUAL:
+                self.process_virtual_telemetry(line)
+            elif self.telemetry_type == PRUSA_MK3:
+                self.process_prusa_mk3_telemetry(line)
+        except Exception as e:
+            if self._debug:
+                self._logger.debug("Error processing telemetry line %r: %s", line, e)
 
-    def _should_send_telemetry(self, telemetry: Dict) -> bool:
+    def _should_send_telemetry(self, tool_temp: Optional[float], bed_temp: Optional[float]) -> bool:
         """
         Determine if telemetry should be sent based on temperature thresholds:
         - Always send if any temperature is above 30°C
         - Only send if temperature change > 0.3°C when below 30°C
         """
-        tool_temp = telemetry.get('tool0_temp')
-        bed_temp = telemetry.get('bed_temp')
-        
-        if self.telemetry_type == "Virtual": # Always send virtual printer telemetry
+        if self.telemetry_type == VIRTUAL: # Always send virtual printer telemetry
             return True
 
-        # Always send if any temperature is above 30°C
-        if (tool_temp and tool_temp > 30.0) or (bed_temp and bed_temp > 30.0):
+        # Always send if any temperature is above 30°C, the common case while printing
+        if tool_temp and tool_temp > 30.0:
+            return True
+        if bed_temp and bed_temp > 30.0:
             return True
             
         # Check for significant temperature changes (> 0.3°C)
-        temp_changed = False
-        if tool_temp and self._last_tool_temp is not None:
-            temp_changed = abs(tool_temp - self._last_tool_temp) > 0.3
-        if bed_temp and self._last_bed_temp is not None:
-            temp_changed = temp_changed or abs(bed_temp - self._last_bed_temp) > 0.3
-            
-        return temp_changed
-
-    def _scale_power(self, value: float) -> float:
-        """Scale power value from 0-127 to 0-100%"""
-        return round((value / 127) * 100, 2)
+        if tool_temp and self._last_tool_temp is not None and abs(tool_temp - self._last_tool_temp) > 0.3:
+            return True
+        return bool(bed_temp and self._last_bed_temp is not None and abs(bed_temp - self._last_bed_temp) > 0.3)
 
     def process_virtual_telemetry(self, line: str) -> None:
         """Process temperature line from Virtual printer
@@ -67,77 +134,27 @@ class TelemetryHandler:
         if not ("T:" in line and "B:" in line):
             return
 
-        telemetry = {}
-        
-        def extract_float(line: str, key: str, end_chars: List[str] = [" ", "/"]) -> Optional[float]:
-            if key not in line:
-                return None
-            try:
-                start = line.find(key) + len(key)
-                end = len(line)
-                for char in end_chars:
-                    pos = line.find(char, start)
-                    if pos != -1:
-                        end = min(end, pos)
-                value_str = line[start:end].strip()
-                return float(value_str)
-            except ValueError as e:
-                self._logger.debug(f"Error parsing value for {key}: {e}")
-                return None
-
-        def extract_target_temp(line: str, key: str) -> Optional[float]:
-            try:
-                key_pos = line.find(key)
-                if key_pos == -1:
-                    return None
-                slash_pos = line.find("/", key_pos)
-                if slash_pos == -1:
-                    return None
-                value_str = line[slash_pos + 1:].strip()
-                for end_char in [" ", "T", "B"]:
-                    space_pos = value_str.find(end_char)
-                    if space_pos != -1:
-                        value_str = value_str[:space_pos]
-                if value_str:  # Only try to convert if we have a non-empty string
-                    return float(value_str)
-                return None
-            except Exception as e:
-                self._logger.debug(f"Error parsing target temp for {key}: {e}")
-                return None
+        telemetry = TelemetryRecord()
 
-        try:
-            # Tool temperature
-            if tool_temp := extract_float(line, "T:"):
-                telemetry["tool0_temp"] = tool_temp
-            
-            # Tool target temperature
-            tool_target = extract_target_temp(line, "T:")
-            if tool_target is not None:
-                telemetry["tool0_target_temp"] = tool_target
-            
-            # Bed temperature
-            if bed_temp := extract_float(line, "B:"):
-                telemetry["bed_temp"] = bed_temp
-            
-            # Bed target temperature
-            bed_target = extract_target_temp(line, "B:")
-            if bed_target is not None:
-                telemetry["bed_target_temp"] = bed_target
-
-            # Tool power
-            if "@:" in line:
-                tool0_power = extract_float(line, "@:")
-                if tool0_power is not None:
-                    telemetry["tool0_power"] = self._scale_power(tool0_power)
-
-            if self._should_send_telemetry(telemetry):
-                self._buffer_telemetry(telemetry)
-                # Update last sent temperatures
-                self._last_tool_temp = telemetry.get('tool0_temp')
-                self._last_bed_temp = telemetry.get('bed_temp')
+        fields = _fields(_TELEMETRY_RE, line)
 
-        except Exception as e:
-            self._logger.debug(f"Error parsing virtual printer telemetry: {e}")
+        # Tool temperature and target
+        if tool := fields.get("T"):
+            telemetry.tool0_temp = float(tool[0])
+            if tool[1]:
+                telemetry.tool0_target_temp = float(tool[1])
+
+        # Bed temperature and target
+        if bed := fields.get("B"):
+            telemetry.bed_temp = float(bed[0])
+            if bed[1]:
+                telemetry.bed_target_temp = float(bed[1])
+
+        # Tool power
+        if tool_power := fields.get("@"):
+            telemetry.tool0_power = round(float(tool_power[0]) * _POWER_SCALE, 2)
+
+        self._emit_telemetry(telemetry)
 
     def process_prusa_mk3_telemetry(self, line: str) -> None:
         """Process temperature and power lines from Prusa MK3 printer
@@ -145,149 +162,138 @@ class TelemetryHandler:
         Example temp line: T:22.6 /0.0 B:23.7 /0.0 T0:22.6 /0.0 @:0 B@:0 P:0.0 A:30.6
         Example power line: E0:0 RPM PRN1:0 RPM E0@:0 PRN1@:0
         """
-        first_char = line[0]
-        if first_char == 'T' and "T:" in line and "B:" in line:
-            self._pending_temp = line
-            if self._pending_power:
-                self._process_prusa_mk3_data()
-        elif first_char == 'E' and "E0:" in line and "RPM" in line:
-            self._pending_power = line
-            if self._pending_temp:
-                self._process_prusa_mk3_data()
-
-    def _process_prusa_mk3_data(self) -> None:
-        """Process collected temperature and power data for Prusa MK3"""
-        if not self._pending_temp or not self._pending_power:
+        if line.startswith("T:") and "B:" in line:
+            slot = 0
+        elif line.startswith("E0:") and "RPM" in line:
+            slot = 1
+        else:
             return
 
-        temp_line = self._pending_temp
-        power_line = self._pending_power
-        telemetry = {}
-        
-        def extract_float(line: str, key: str, end_chars: List[str] = [" "]) -> Optional[float]:
-            """Extract float value from line with improved error handling"""
-            if key not in line:
-                return None
-            try:
-                start = line.find(key) + len(key)
-                end = len(line)
-                for char in end_chars:
-                    pos = line.find(char, start)
-                    if pos != -1:
-                        end = min(end, pos)
-                # Remove 'RPM' suffix if present
-                value_str = line[start:end].replace('RPM', '').strip()
-                return float(value_str)
-            except ValueError as e:
-                self._logger.debug(f"Error parsing value for {key}: {e}")
-                return None
-
-        def extract_target_temp(line: str, key: str) -> Optional[float]:
-            """Extract target temperature value after the '/' character"""
-            try:
-                key_pos = line.find(key)
-                if key_pos == -1:
-                    return None
-                slash_pos = line.find("/", key_pos)
-                if slash_pos == -1:
-                    return None
-                value_str = line[slash_pos + 1:].strip()
-                for end_char in [" ", "T", "B"]:
-                    space_pos = value_str.find(end_char)
-                    if space_pos != -1:
-                        value_str = value_str[:space_pos]
-                if value_str:  # Only try to convert if we have a non-empty string
-                    return float(value_str)
-                return None
-            except Exception as e:
-                self._logger.debug(f"Error parsing target temp for {key}: {e}")
-                return None
+        pending = self._pending
+        pending[slot] = line
+        if pending[1 - slot]:
+            self._pending = [None, None]
+            self._process_prusa_mk3_data(*pending)
 
-        try:
-            # Parse temperature line
-            # Tool temperatures (try both T: and T0:)
-            tool_temp = extract_float(temp_line, "T0:") or extract_float(temp_line, "T:")
-            if tool_temp is not None:
-                telemetry["tool0_temp"] = tool_temp
-                
-            # Tool target temperature
-            tool_target = extract_target_temp(temp_line, "T0:") or extract_target_temp(temp_line, "T:")
-            if tool_target is not None:
-                telemetry["tool0_target_temp"] = tool_target
-            
-            # Bed temperature and target
-            if bed_temp := extract_float(temp_line, "B:"):
-                telemetry["bed_temp"] = bed_temp
-            
-            # Parse bed target temp separately to ensure it's captured
-            bed_target = extract_target_temp(temp_line, "B:")
-            if bed_target is not None:
-                telemetry["bed_target_temp"] = bed_target
-
-            # Tool and bed power values (scaled from 0-127 to 0-100%)
-            if "@:" in temp_line:
-                tool0_power = extract_float(temp_line, "@:")
-                if tool0_power is not None:
-                    telemetry["tool0_power"] = self._scale_power(tool0_power)
-            
-            if "B@:" in temp_line:
-                bed_power = extract_float(temp_line, "B@:")
-                if bed_power is not None:
-                    telemetry["bed_power"] = self._scale_power(bed_power)
-
-            # Ambient temperature
-            if ambient_temp := extract_float(temp_line, "A:"):
-                telemetry["ambient_temp"] = ambient_temp
-
-            # Parse fan speeds (removing RPM suffix)
-            if "E0:" in power_line:
-                heatsink_fan = extract_float(power_line, "E0:")
-                if heatsink_fan is not None:
-                    telemetry["tool0_heatsink_fan_rpm"] = round(heatsink_fan, 2)
-            
-            if "PRN1:" in power_line:
-                part_fan = extract_float(power_line, "PRN1:")
-                if part_fan is not None:
-                    telemetry["tool0_part_fan_rpm"] = round(part_fan, 2)
+    def _process_prusa_mk3_data(self, temp_line: str, power_line: str) -> None:
+        """Process collected temperature and power data for Prusa MK3"""
+        telemetry = TelemetryRecord()
 
-            if self._should_send_telemetry(telemetry):
-                self._buffer_telemetry(telemetry)
-                # Update last sent temperatures
-                self._last_tool_temp = telemetry.get('tool0_temp')
-                self._last_bed_temp = telemetry.get('bed_temp')
+        fields = _fields(_TELEMETRY_RE, temp_line + self._SENTINEL + power_line)
 
-        except Exception as e:
-            self._logger.debug(f"Error parsing Prusa MK3 telemetry: {e}")
-        finally:
-            self._pending_temp = None
-            self._pending_power = None
+        # Tool temperature and target (try both T0: and T:)
+        if tool := fields.get("T0") or fields.get("T"):
+            telemetry.tool0_temp = float(tool[0])
+            if tool[1]:
+                telemetry.tool0_target_temp = float(tool[1])
+
+        # Bed temperature and target
+        if bed := fields.get("B"):
+            telemetry.bed_temp = float(bed[0])
+            if bed[1]:
+                telemetry.bed_target_temp = float(bed[1])
+
+        # Tool and bed power values (scaled from 0-127 to 0-100%)
+        if tool_power := fields.get("@"):
+            telemetry.tool0_power = round(float(tool_power[0]) * _POWER_SCALE, 2)
+        if bed_power := fields.get("B@"):
+            telemetry.bed_power = round(float(bed_power[0]) * _POWER_SCALE, 2)
+
+        # Ambient temperature
+        if ambient := fields.get("A"):
+            telemetry.ambient_temp = float(ambient[0])
+
+        # Fan speeds
+        if heatsink_fan := fields.get("E0"):
+            telemetry.tool0_heatsink_fan_rpm = round(float(heatsink_fan[0]), 2)
+        if part_fan := fields.get("PRN1"):
+            telemetry.tool0_part_fan_rpm = round(float(part_fan[0]), 2)
+
+        self._emit_telemetry(telemetry)
             
-    def _buffer_telemetry(self, telemetry: Dict) -> None:
-        """Add telemetry to buffer and send if buffer is full"""
-        timestamped_telemetry = {
-            "data": telemetry,
-            "source_timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        self._telemetry_buffer.append(timestamped_telemetry)
-        self._logger.debug(f"Added telemetry to buffer. Buffer size: {len(self._telemetry_buffer)}")
+    def _emit_telemetry(self, telemetry: TelemetryRecord) -> None:
+        """Buffer a parsed reading if it passes the temperature filter"""
+        tool_temp = telemetry.tool0_temp
+        bed_temp = telemetry.bed_temp
+        if self._should_send_telemetry(tool_temp, bed_temp):
+            self._buffer_telemetry(telemetry)
+            # Update last sent temperatures
+            self._last_tool_temp = tool_temp
+            self._last_bed_temp = bed_temp
+
+    def _buffer_telemetry(self, telemetry: TelemetryRecord) -> None:
+        """Add telemetry to buffer and wake the sender if buffer is full"""
+        # Buffered as a plain (record, first_ns, last_ns) tuple with monotonic timestamps, turned
+        # into event data and wall-clock time once per batch when it is sent
+        recorded_ns = time.monotonic_ns()
+        with self._buffer_lock:
+            buffer = self._telemetry_buffer
+            if buffer and buffer[-1][0] == telemetry:
+                # Unchanged since the previous reading (heat soak, idle), only extend its run
+                buffer[-1] = (telemetry, buffer[-1][1], recorded_ns)
+                return
+            buffer.append((telemetry, recorded_ns, None))
+            pending = len(buffer)
+        if self._debug:
+            self._logger.debug("Added telemetry to buffer. Buffer size: %d", pending)
         
-        if len(self._telemetry_buffer) >= self.BUFFER_SIZE:
+        if pending >= self.BUFFER_SIZE:
+            self._flush_event.set()
+
+    def _sender_loop(self) -> None:
+        """Send buffered telemetry off the gcode receive thread until shut down"""
+        while not self._stopped:
+            # OctoPrint's logging plugin changes levels without any event, so pick them up here
+            self.update_log_level()
+            self._flush_event.wait(self.SEND_INTERVAL)
+            self._flush_event.clear()
             self._send_buffered_telemetry()
     
     def _send_buffered_telemetry(self) -> None:
-        """Send buffered telemetry and clear buffer"""
-        if not self._telemetry_buffer:
-            return
-            
+        """Send buffered telemetry, keeping it buffered if sending fails"""
+        with self._buffer_lock:
+            if not self._telemetry_buffer:
+                return
+            batch = list(self._telemetry_buffer)
+            self._telemetry_buffer.clear()
+
         try:
-            self.additv_client.publish_telemetry_batch(self._telemetry_buffer)
-            self._logger.debug(f"Published batch of {len(self._telemetry_buffer)} telemetry events")
+            self.additv_client.publish_telemetry_batch(self._timestamp_batch(batch))
+            self._logger.debug("Published batch of %d telemetry events", len(batch))
         except Exception as e:
             self._logger.error(f"Failed to send telemetry batch: {e}")
-        finally:
-            self._telemetry_buffer = []
+            # Put the batch back in front of anything newer for the next attempt. extendleft() on a
+            # full deque would drop the newest records, so trim the oldest of the batch instead
+            with self._buffer_lock:
+                overflow = len(batch) + len(self._telemetry_buffer) - self.MAX_BUFFER_SIZE
+                self._telemetry_buffer.extendleft(reversed(batch[max(overflow, 0):]))
             
+    @staticmethod
+    def _timestamp_batch(batch: List[tuple]) -> List[tuple]:
+        """
+        Convert buffered records to (data, source_timestamp) events, with the monotonic timestamps
+        turned into ISO 8601 UTC. A run of identical readings is sent as its first and last reading.
+        """
+        # One wall-clock reading for the whole batch
+        offset_ns = time.time_ns() - time.monotonic_ns()
+        events = []
+        # Readings arrive about once a second, so the date and time part is only formatted
+        # when the second changes
+        prefix_second = None
+        for telemetry, first_ns, last_ns in batch:
+            data = telemetry.to_dict()
+            for recorded_ns in (first_ns, last_ns):
+                if recorded_ns is not None:
+                    second, micros = divmod((offset_ns + recorded_ns) // 1000, 1_000_000)
+                    if second != prefix_second:
+                        prefix_second = second
+                        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+                    events.append((data, f"{prefix}.{micros:06d}+00:00"))
+        return events
+
     def on_shutdown(self) -> None:
-        """Flush any remaining telemetry on shutdown"""
-        if self._telemetry_buffer:
-            self._send_buffered_telemetry()
+        """Stop the sender thread and flush any remaining telemetry"""
+        self._stopped = True
+        self._flush_event.set()
+        self._sender.join(timeout=5)
+        self._send_buffered_telemetry()
@@ -25,7 +25,10 @@ setup(
         "OctoPrint>=1.10.0,<2.0.0",
         "supabase>=2.12.0,<3.0.0",
         "pyyaml~=6.0",
-        "requests>=2.32.0,<3.0.0"
+        "requests>=2.32.0,<3.0.0",
+        "urllib3>=2.0.0,<3.0.0",
+        "certifi",
+        "httpx>=0.26.0,<1.0.0"
     ],
     entry_points={
         "octoprint.plugin": [